@@ -0,0 +1,62 @@
+# restore time of a snapshotted session vs. a cold VideoIntelligence init
+# usage: python -m benchmarks.session_restore <youtube url | .mp4 url> [--repeats N]
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from core.main import VideoIntelligence
+
+
+def time_restores(processor, directory, repeats, touch_video=False):
+    timings = []
+    for _ in range(repeats):
+        if touch_video:
+            # new mtime, so restore can't trust the recorded stat and re-hashes the whole video
+            os.utime(processor.video_path)
+        start = time.perf_counter()
+        VideoIntelligence.restore(
+            processor.video_hash, processor.session_id, directory=directory
+        )
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", help="YouTube URL or direct .mp4 URL")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # run in a scratch dir, so neither the downloaded video (.assets/) nor the records touch live sessions
+    workdir = tempfile.mkdtemp(prefix="intellivid_bench_")
+    session_directory = os.path.join(workdir, "sessions")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        start = time.perf_counter()
+        processor = VideoIntelligence(args.source)
+        cold_init = time.perf_counter() - start
+
+        start = time.perf_counter()
+        processor.snapshot(directory=session_directory)
+        snapshot = time.perf_counter() - start
+
+        restore = time_restores(processor, session_directory, args.repeats)
+        restore_rehash = time_restores(
+            processor, session_directory, args.repeats, touch_video=True
+        )
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"cold init:                  {cold_init:8.3f}s")
+    print(f"snapshot:                   {snapshot:8.3f}s")
+    print(f"restore (median):           {restore:8.3f}s  over {args.repeats} runs, {cold_init / restore:.1f}x")
+    print(f"restore, re-hash (median):  {restore_rehash:8.3f}s  over {args.repeats} runs, {cold_init / restore_rehash:.1f}x  (video touched, as after a copy/move)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,36 @@
 import json
 import mimetypes
 import os
+import re
 import shutil
 import tempfile
 import time
 import traceback
 import typing
+import uuid
+from datetime import datetime, timezone
 
 import pydantic
 import requests
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 
 from .utils import (
     concatenate_scenes,
     download_yt_video,
+    file_content_hash,
     get_video_duration_seconds,
     is_yt_url,
+    render_scenes_progressively,
     timestamp_to_seconds,
 )
 
 
+SESSION_DIRECTORY = os.path.join(".assets", "sessions")
+CHAT_SYSTEM_INSTRUCTION = "You are an expert video analyzer, and your job is to answer the user's query based on the provided video. Always respond in a natural tone."
+HIGHLIGHT_SYSTEM_INSTRUCTION = "You are an expert video analyst. Carefully examine the provided video thoroughly. Identify and provide timestamps of any potential highlights, significant events, key, or noteworthy moments found within the video. Keep it concise"
+
+
 class TimeStamp(pydantic.BaseModel):
     start_time: str = pydantic.Field(
         ...,
@@ -57,6 +67,7 @@ class VideoIntelligence:
         self.client = genai.Client()
 
         self.token_count = {"input": 0, "output": 0, "total": 0}
+        self.session_id = uuid.uuid4().hex
         try:
             # check video type and create part accordingly
             if is_yt_url(path):
@@ -65,12 +76,15 @@ class VideoIntelligence:
 
             elif path.startswith("https") and path.endswith(".mp4"):
                 self.video_path = os.path.join(temp_directory, "video.mp4")
-                # download video
+                # download video, then swap it in, so a snapshot's hard link to the previous video stays intact
                 response = requests.get(path, stream=True)
-                with open(self.video_path, "wb") as file:
+                with tempfile.NamedTemporaryFile(
+                    dir=temp_directory, suffix=".mp4", delete=False
+                ) as file:
                     for chunk in response.iter_content(chunk_size=1024):
                         if chunk:
                             file.write(chunk)
+                os.replace(file.name, self.video_path)
 
                 self.video_part = self.get_video_part(self.video_path)
 
@@ -97,7 +111,7 @@ class VideoIntelligence:
                 model=self.model_id,
                 # TODO: add video to chat history while instantiation (couldn't get it working as of now)
                 config=types.GenerateContentConfig(
-                    system_instruction="You are an expert video analyzer, and your job is to answer the user's query based on the provided video. Always respond in a natural tone.",
+                    system_instruction=CHAT_SYSTEM_INSTRUCTION,
                     **self.gen_config,
                 ),
             )
@@ -112,11 +126,154 @@ class VideoIntelligence:
             )  # need comprehensive, as is
 
             self.video_seconds = get_video_duration_seconds(self.video_path)
+            self.video_hash = file_content_hash(self.video_path)
 
         except Exception as e:
             traceback.print_exc()
             raise RuntimeError(f"Failed to process video content: {str(e)}")
 
+    @classmethod
+    def restore(cls, video_hash: str, session_id: str, directory=SESSION_DIRECTORY):
+        # rehydrate a snapshotted session, without re-priming the video (or re-uploading it, while the upload is alive)
+        # both ids may come from the url, never let them walk out of the session directory
+        if not re.fullmatch(r"[0-9a-f]{64}", video_hash) or not re.fullmatch(
+            r"[0-9a-f]{32}", session_id
+        ):
+            raise ValueError("Invalid session reference")
+
+        record_path = os.path.join(directory, video_hash, f"{session_id}.json")
+        if not os.path.exists(record_path):
+            raise ValueError(f"No saved session found at {record_path}")
+
+        with open(record_path) as f:
+            record = json.load(f)
+
+        if not os.path.exists(record["video_path"]):
+            raise RuntimeError("Local video of the saved session is missing")
+
+        # only re-hash (a full read, can be GBs) when the stored copy looks touched since the snapshot
+        stat = os.stat(record["video_path"])
+        if [stat.st_size, stat.st_mtime_ns] != record["video_stat"] and (
+            file_content_hash(record["video_path"]) != video_hash
+        ):
+            raise RuntimeError("Local video of the saved session has changed")
+
+        self = cls.__new__(cls)
+        self.model_id = record["model_id"]
+        self.num_retries = 3
+        self.client = genai.Client()
+        self.gen_config = record["gen_config"]
+        self.token_count = record["token_count"]
+        self.video_seconds = record["video_seconds"]
+        self.video_path = record["video_path"]
+        self.video_hash = video_hash
+        self.session_id = session_id
+
+        video_file = None
+        if record["video_file"]:
+            # uploaded files expire on the remote side (~48h), check before trusting the handle
+            expiration_time = record["video_file"]["expiration_time"]
+            if not expiration_time or datetime.fromisoformat(
+                expiration_time
+            ) > datetime.now(timezone.utc):
+                try:
+                    video_file = self.client.files.get(
+                        name=record["video_file"]["name"]
+                    )
+                except errors.APIError:
+                    video_file = None  # already deleted
+                if video_file and video_file.state.name != "ACTIVE":
+                    video_file = None
+
+        if video_file:
+            self.video_part = video_file
+        else:
+            # inline sized, or the upload is gone: re-attach from the local copy (uploads it again if
+            # it's too big to inline). the saved history still spares re-priming and token recounting
+            self.video_part = self.get_video_part(self.video_path)
+
+        if isinstance(self.video_part, types.File):
+            video_history_part = types.Part.from_uri(
+                file_uri=self.video_part.uri, mime_type=self.video_part.mime_type
+            )
+        else:
+            video_history_part = self.video_part
+
+        history = [types.Content(role="user", parts=[video_history_part])]
+        # json mode, so base64'd bytes (inline data, thought signatures) are decoded back
+        history += [
+            types.Content.model_validate_json(json.dumps(c)) for c in record["history"]
+        ]
+        self.model_chat = self.client.chats.create(
+            model=self.model_id,
+            config=types.GenerateContentConfig(
+                system_instruction=CHAT_SYSTEM_INSTRUCTION,
+                **self.gen_config,
+            ),
+            history=history,
+        )
+
+        if record["video_file"] and not video_file:
+            self.snapshot(directory)  # keep the fresh upload's handle in the record
+        return self
+
+    def snapshot(self, directory=SESSION_DIRECTORY):
+        # the video itself is left out of the record, restore() re-attaches it from the local file/remote handle
+        session_directory = os.path.join(directory, self.video_hash)
+        os.makedirs(session_directory, exist_ok=True)
+
+        # keep the video under its hash, as the source path (e.g. .assets/video.mp4) is shared with later sessions
+        _, ext = os.path.splitext(self.video_path)
+        stored_video_path = os.path.join(session_directory, f"video{ext}")
+        if not os.path.exists(stored_video_path):
+            if file_content_hash(self.video_path) != self.video_hash:
+                raise RuntimeError(
+                    "Video of this session was overwritten on disk, can't snapshot it"
+                )
+            tmp_video_path = f"{stored_video_path}.{self.session_id}.tmp"
+            try:
+                os.link(self.video_path, tmp_video_path)
+            except OSError:
+                shutil.copyfile(self.video_path, tmp_video_path)  # e.g. across devices
+            os.replace(tmp_video_path, stored_video_path)
+        self.video_path = stored_video_path
+
+        video_file = None
+        if isinstance(self.video_part, types.File):
+            video_file = {
+                "name": self.video_part.name,
+                "expiration_time": self.video_part.expiration_time.isoformat()
+                if self.video_part.expiration_time
+                else None,
+            }
+
+        # lets restore() skip hashing the video while the stored copy is untouched
+        stat = os.stat(self.video_path)
+
+        record = {
+            "model_id": self.model_id,
+            "gen_config": self.gen_config,
+            "video_path": self.video_path,
+            "video_stat": [stat.st_size, stat.st_mtime_ns],
+            "video_file": video_file,
+            "video_seconds": self.video_seconds,
+            "token_count": self.token_count,
+            "history": [
+                content.model_dump(mode="json", exclude_none=True)
+                for content in self.model_chat.get_history(curated=False)[1:]
+            ],
+        }
+
+        record_path = os.path.join(session_directory, f"{self.session_id}.json")
+
+        # write then swap, so a crash mid-write never leaves a broken record behind
+        with tempfile.NamedTemporaryFile(
+            "w", dir=session_directory, suffix=".tmp", delete=False
+        ) as tmp_file:
+            json.dump(record, tmp_file, separators=(",", ":"))
+        os.replace(tmp_file.name, record_path)
+        return record_path
+
     def chat(self, message: str):
         try:
             response = self.model_chat.send_message(message)
@@ -207,15 +364,14 @@ class VideoIntelligence:
         self.update_token_count(response.usage_metadata)
         return json.loads(response.text)["summary"].strip()
 
-    def generate_highlight(self):
-        SYSTEM_INSTRUCTION = (
-            "You are an expert video analyst. Carefully examine the provided video thoroughly. Identify and provide timestamps of any potential highlights, significant events, key, or noteworthy moments found within the video. Keep it concise",
+    def get_highlight_segments(self):
+        return self.get_correct_response(
+            [self.video_part], HIGHLIGHT_SYSTEM_INSTRUCTION, HighlightOut
         )
 
+    def generate_highlight(self):
         try:
-            segments = self.get_correct_response(
-                [self.video_part], SYSTEM_INSTRUCTION, HighlightOut
-            )
+            segments = self.get_highlight_segments()
 
             if segments:
                 with tempfile.NamedTemporaryFile(
@@ -231,6 +387,26 @@ class VideoIntelligence:
         except Exception as e:
             return None, "Process interrupted. Error occured: {}".format(str(e))
 
+    def generate_highlight_progressive(self):
+        # same as generate_highlight, but yields each highlight as an independent fragment as soon as it's cut
+        try:
+            segments = self.get_highlight_segments()
+
+            if segments:
+                output_dir = tempfile.mkdtemp(prefix="highlights_")
+                for idx, fragment_path in enumerate(
+                    render_scenes_progressively(self.video_path, segments, output_dir)
+                ):
+                    yield fragment_path, "Highlight {}/{} ready!".format(
+                        idx + 1, len(segments)
+                    )
+
+            else:
+                yield None, "No highlight found!"
+
+        except Exception as e:
+            yield None, "Process interrupted. Error occured: {}".format(str(e))
+
     def identify_moment(self, query: str):
         SYSTEM_PROMPT = "You are a highly skilled expert in video analysis with deep expertise in frame-by-frame inspection, scene recognition, and precise timestamp identification. Your task is to carefully examine a given video and accurately determine the exact timestamp(s) that correspond to the user's query, only if it exist in the video. You must ensure a thorough and detailed analysis before making a decision. Maintain accuracy, attention to detail while delivering results with concistent and correct formatting."
         try:
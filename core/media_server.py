@@ -0,0 +1,157 @@
+import mimetypes
+import os
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .utils import file_content_hash
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+IGNORE_RANGE = object()  # range header we don't handle, answer with the full file
+CHUNK_SIZE = 1024 * 1024
+
+
+# serves local videos by content-hash URL, so the browser fetches each file once
+# (urls never change content, hence immutable caching) and seeks with range requests
+class MediaServer:
+    def __init__(self, host="127.0.0.1", port=8765, public_url=None):
+        self.files = {}  # content hash -> local path
+        self.lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        bound_host, bound_port = self.httpd.server_address[:2]
+        self.public_url = (public_url or f"http://{bound_host}:{bound_port}").rstrip(
+            "/"
+        )
+
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url_for(self, path):
+        content_hash = file_content_hash(path)
+        with self.lock:
+            self.files[content_hash] = os.path.abspath(path)
+        _, ext = os.path.splitext(path)
+        return f"{self.public_url}/media/{content_hash}{ext}"
+
+    def lookup(self, content_hash):
+        with self.lock:
+            path = self.files.get(content_hash)
+        # the same path can be rewritten with another video, never serve other bytes under an old hash
+        # (memoised on mtime/size, so this is just a stat unless the file changed)
+        if path and os.path.exists(path) and file_content_hash(path) == content_hash:
+            return path
+        return None
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _make_handler(self):
+        server = self
+
+        class MediaRequestHandler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self.serve(send_body=False)
+
+            def do_GET(self):
+                self.serve(send_body=True)
+
+            def serve(self, send_body):
+                match = re.fullmatch(r"/media/([0-9a-f]{64})(\.\w+)?", self.path)
+                path = server.lookup(match.group(1)) if match else None
+                if path is None:
+                    self.send_error(HTTPStatus.NOT_FOUND)
+                    return
+
+                etag = f'"{match.group(1)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(HTTPStatus.NOT_MODIFIED)
+                    self.send_cache_headers(etag)
+                    self.end_headers()
+                    return
+
+                size = os.path.getsize(path)
+                start, end = 0, size - 1
+                status = HTTPStatus.OK
+
+                if range_header := self.headers.get("Range"):
+                    byte_range = self.parse_range(range_header, size)
+                    if byte_range is None:
+                        self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    if byte_range is not IGNORE_RANGE:
+                        start, end = byte_range
+                        status = HTTPStatus.PARTIAL_CONTENT
+
+                length = end - start + 1
+                self.send_response(status)
+                self.send_header(
+                    "Content-Type",
+                    mimetypes.guess_type(path)[0] or "application/octet-stream",
+                )
+                self.send_header("Content-Length", str(length))
+                self.send_header("Accept-Ranges", "bytes")
+                if status == HTTPStatus.PARTIAL_CONTENT:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.send_cache_headers(etag)
+                self.end_headers()
+
+                if not send_body:
+                    return
+
+                try:
+                    with open(path, "rb") as f:
+                        f.seek(start)
+                        remaining = length
+                        while remaining > 0:
+                            chunk = f.read(min(CHUNK_SIZE, remaining))
+                            if not chunk:
+                                break
+                            self.wfile.write(chunk)
+                            remaining -= len(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # player dropped the connection (seek), nothing to do
+
+            def send_cache_headers(self, etag):
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+                self.send_header("Access-Control-Allow-Origin", "*")
+
+            @staticmethod
+            def parse_range(range_header, size):
+                # only single ranges, that's all video players ask for. multi-range or
+                # malformed headers are ignored (full 200), only unsatisfiable ones get None (416)
+                match = RANGE_PATTERN.match(range_header.strip())
+                if not match:
+                    return IGNORE_RANGE
+
+                first, last = match.groups()
+                if first == "" and last == "":
+                    return IGNORE_RANGE
+                if size == 0:
+                    return None
+                if first == "":
+                    # suffix range: last N bytes
+                    suffix = int(last)
+                    if suffix == 0:
+                        return None
+                    return max(size - suffix, 0), size - 1
+
+                start = int(first)
+                if start >= size:
+                    return None
+                end = int(last) if last else size - 1
+                if end < start:
+                    return IGNORE_RANGE
+                return start, min(end, size - 1)
+
+            def log_message(self, format, *args):
+                pass  # keep the streamlit console clean
+
+        return MediaRequestHandler
@@ -1,3 +1,9 @@
+import functools
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from moviepy import VideoFileClip, concatenate_videoclips
 from pytubefix import YouTube
 from pytubefix.cli import on_progress
@@ -57,6 +63,68 @@ def concatenate_scenes(video_path, scene_times, output_path):
     final_clip.write_videofile(output_path)
 
 
+# fragmented mp4 (moov up front, one moof per keyframe) so each cut is playable before it's fully written/fetched
+FRAGMENTED_MP4_FLAGS = ["-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+
+
+def render_scene(video_path, start_sec, end_sec, output_path):
+    # runs in a worker process, so it opens its own handle on the source
+    with VideoFileClip(video_path) as video:
+        scene_clip = video.subclipped(start_sec, end_sec)
+        # keep moviepy's temp audio next to the (unique) output, not in the shared cwd
+        scene_clip.write_videofile(
+            output_path,
+            ffmpeg_params=FRAGMENTED_MP4_FLAGS,
+            temp_audiofile_path=os.path.dirname(output_path),
+            logger=None,
+        )
+    return output_path
+
+
+def render_scenes_progressively(video_path, scene_times, output_dir, max_workers=None):
+    # cut every scene in parallel and yield the fragments in playback order,
+    # each one as soon as it and all the ones before it are done
+    os.makedirs(output_dir, exist_ok=True)
+    max_workers = max_workers or max(1, min(len(scene_times), os.cpu_count() or 1))
+
+    # spawn, as forking the multithreaded streamlit process can deadlock
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        futures = [
+            executor.submit(
+                render_scene,
+                video_path,
+                start_sec,
+                end_sec,
+                os.path.join(output_dir, "segment_{:03d}.mp4".format(idx)),
+            )
+            for idx, (start_sec, end_sec) in enumerate(scene_times)
+        ]
+        for future in futures:
+            yield future.result()
+    finally:
+        # the consumer may stop early (e.g. a streamlit rerun), drop whatever is still queued
+        # and don't wait on in-flight renders nobody will see
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def get_video_duration_seconds(video_path):
     with VideoFileClip(video_path) as vf:
         return vf.duration
+
+
+@functools.lru_cache(maxsize=256)
+def _hash_file(path, mtime_ns, size):
+    # mtime and size are part of the key, so a rewritten file gets re-hashed
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_content_hash(path):
+    stat = os.stat(path)
+    return _hash_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
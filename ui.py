@@ -1,6 +1,10 @@
+import os
+from urllib.parse import urlsplit
+
 import streamlit as st
 
 from core.main import VideoIntelligence
+from core.media_server import MediaServer
 
 # Set page configuration
 st.set_page_config(
@@ -87,6 +91,8 @@ if "processing_complete" not in st.session_state:
     st.session_state.processing_complete = False
 if "highlight_video" not in st.session_state:
     st.session_state.highlight_video = None
+if "highlight_fragments" not in st.session_state:
+    st.session_state.highlight_fragments = []
 if "moment_video" not in st.session_state:
     st.session_state.moment_video = None
 if "token_count" not in st.session_state:
@@ -101,19 +107,97 @@ def process_video(video_source):
             st.session_state.video_path = st.session_state.video_processor.video_path
             st.session_state.token_count = st.session_state.video_processor.token_count
             st.session_state.processing_complete = True
+            save_session()
             return True
     except Exception as e:
         st.error(f"Error processing video: {str(e)}")
         return False
 
 
+def save_session():
+    # snapshot to disk and keep the keys in the url, so a restart can pick the session back up
+    processor = st.session_state.video_processor
+    try:
+        processor.snapshot()
+        st.query_params["video"] = processor.video_hash
+        st.query_params["session"] = processor.session_id
+    except Exception as e:
+        st.warning(f"Could not save the session: {str(e)}")
+
+
+def restore_session(video_hash, session_id):
+    try:
+        with st.spinner("Restoring previous session..."):
+            processor = VideoIntelligence.restore(video_hash, session_id)
+
+            # first exchange is the video priming, the rest is the actual conversation
+            # (uncurated, like the snapshot, so an empty priming reply doesn't shift it)
+            messages = []
+            for content in processor.model_chat.get_history(curated=False)[2:]:
+                text = "".join(part.text or "" for part in (content.parts or []))
+                if text:
+                    messages.append(
+                        {
+                            "role": "user" if content.role == "user" else "assistant",
+                            "content": text,
+                        }
+                    )
+    except Exception as e:
+        st.query_params.clear()
+        st.warning(f"Could not restore the previous session: {str(e)}")
+        return False
+
+    st.session_state.video_processor = processor
+    st.session_state.video_path = processor.video_path
+    st.session_state.token_count = processor.token_count
+    st.session_state.processing_complete = True
+    st.session_state.messages.extend(messages)
+    return True
+
+
+@st.cache_resource
+def get_media_server():
+    # one server per process, shared by every session and rerun
+    try:
+        return MediaServer(
+            host=os.environ.get("INTELLIVID_MEDIA_HOST", "127.0.0.1"),
+            port=int(os.environ.get("INTELLIVID_MEDIA_PORT", 8765)),
+            public_url=os.environ.get("INTELLIVID_MEDIA_URL"),
+        )
+    except OSError:
+        return None  # e.g. port taken, videos go through streamlit instead
+
+
+def media_url(video_path):
+    media_server = get_media_server()
+    if media_server is None:
+        return None
+
+    if not os.environ.get("INTELLIVID_MEDIA_URL"):
+        # default server is on loopback, only a browser on this machine can reach it
+        host = urlsplit("//" + st.context.headers.get("Host", "")).hostname
+        if host not in ("localhost", "127.0.0.1"):
+            return None
+
+    return media_server.url_for(video_path)
+
+
 def display_video(video_path):
     if video_path:
-        st.video(video_path)
+        # reference the file by url when possible, so reruns don't push the video through the websocket again
+        st.video(media_url(video_path) or video_path)
     else:
         st.warning("No video available to display.")
 
 
+if (
+    st.session_state.video_processor is None
+    and "video" in st.query_params
+    and "session" in st.query_params
+):
+    restore_session(st.query_params["video"], st.query_params["session"])
+
+
 # Main app header
 st.markdown(
     "<div class='main-header'>AI-powered Video Analysis Application 🎥🧠</div>",
@@ -207,6 +291,7 @@ if st.session_state.processing_complete:
                     st.session_state.token_count = (
                         st.session_state.video_processor.token_count
                     )
+                    save_session()
 
     # Highlight Generation Tab
     with tabs[1]:
@@ -227,25 +312,68 @@ if st.session_state.processing_complete:
 
             with col2:
                 st.markdown("**Highlights**")
-                if st.session_state.highlight_video:
-                    display_video(st.session_state.highlight_video)
-                else:
-                    st.info("Generate highlights to view them here")
+                # single slot, so a new generation can wipe the previous highlights before streaming in
+                highlight_slot = st.empty()
+                with highlight_slot.container():
+                    if st.session_state.highlight_fragments:
+                        for fragment in st.session_state.highlight_fragments:
+                            display_video(fragment)
+                    elif st.session_state.highlight_video:
+                        display_video(st.session_state.highlight_video)
+                    else:
+                        st.info("Generate highlights to view them here")
+
+            progressive = st.checkbox(
+                "Progressive rendering",
+                value=True,
+                help="Play each highlight as soon as it's cut, instead of waiting for the whole highlight reel.",
+            )
 
             if st.button("Generate Highlights"):
+                st.session_state.highlight_video = None
+                st.session_state.highlight_fragments = []
+                highlight_slot.empty()
+                # fragments render into this container as they arrive
+                highlight_container = highlight_slot.container()
                 with st.spinner("Generating highlights..."):
-                    highlight_path, message = (
-                        st.session_state.video_processor.generate_highlight()
-                    )
-                    st.session_state.token_count = (
-                        st.session_state.video_processor.token_count
-                    )
+                    if progressive:
+                        for fragment_path, message in (
+                            st.session_state.video_processor.generate_highlight_progressive()
+                        ):
+                            st.session_state.token_count = (
+                                st.session_state.video_processor.token_count
+                            )
+
+                            if fragment_path:
+                                st.session_state.highlight_fragments.append(
+                                    fragment_path
+                                )
+                                with highlight_container:
+                                    display_video(fragment_path)
+                                st.toast(message)
+                            else:
+                                st.info(message)
+
+                        save_session()
+                        if st.session_state.highlight_fragments:
+                            st.success("Highlights generated!")
 
-                    if highlight_path:
-                        st.session_state.highlight_video = highlight_path
-                        st.success(message)
                     else:
-                        st.info(message)
+                        highlight_path, message = (
+                            st.session_state.video_processor.generate_highlight()
+                        )
+                        st.session_state.token_count = (
+                            st.session_state.video_processor.token_count
+                        )
+                        save_session()
+
+                        if highlight_path:
+                            st.session_state.highlight_video = highlight_path
+                            with highlight_container:
+                                display_video(highlight_path)
+                            st.success(message)
+                        else:
+                            st.info(message)
 
     # Visual Grounding Tab
     with tabs[2]:
@@ -280,6 +408,7 @@ if st.session_state.processing_complete:
                     st.session_state.token_count = (
                         st.session_state.video_processor.token_count
                     )
+                    save_session()
 
                     if moment_path:
                         st.session_state.moment_video = moment_path
@@ -302,6 +431,7 @@ if st.session_state.processing_complete:
                     st.session_state.token_count = (
                         st.session_state.video_processor.token_count
                     )
+                    save_session()
 
                 st.markdown(response)
 